@@ -1,9 +1,98 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, Response
 from analyze_reputation import ReputationAnalyzer
+import fastjson
+import hashlib
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
+try:
+    from flask_compress import Compress
+except ImportError:
+    Compress = None
 
 app = Flask(__name__)
 
+# Compression des réponses: le rapport /analyze pèse 5-20 KB de JSON et
+# compresse très bien — les octets sur le fil dominent pour les clients lents
+if Compress is not None:
+    app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+    app.config['COMPRESS_MIN_SIZE'] = 500
+    Compress(app)
+
+# Cache des rapports: une requête répétée (nom, ville) ne repaie ni le
+# quota SerpAPI ni les tokens OpenAI pendant la durée du TTL
+CACHE_TTL = int(os.environ.get('REPORT_CACHE_TTL', '86400'))
+CACHE_DIR = os.environ.get('REPORT_CACHE_DIR', '/tmp/reputation_cache')
+BATCH_WORKERS = int(os.environ.get('WORKERS', '10'))
+
+if diskcache is not None:
+    _report_cache = diskcache.Cache(CACHE_DIR)
+else:
+    _report_cache = {}  # Repli mémoire: {clé: (expiration, rapport)}
+
+_cache_stats = {"hits": 0, "calls": 0}
+
+
+def ojson(payload, status=200):
+    """Réponse JSON via orjson/fastjson — jsonify passe par l'encodeur stdlib,
+    le plus lent; le rapport /analyze (5-20 KB, raw_reviews_sample imbriqué)
+    se sérialise ~10x plus vite en bytes natifs"""
+    return Response(fastjson.dumps_bytes(payload), status=status,
+                    mimetype='application/json')
+
+
+def _cache_key(clinic_name: str, clinic_location: str) -> str:
+    """Clé normalisée (insensible à la casse et aux espaces)"""
+    normalized = f"{clinic_name.lower().strip()}|{clinic_location.lower().strip()}"
+    return hashlib.sha1(normalized.encode()).hexdigest()
+
+
+def _cache_get(key: str):
+    if diskcache is not None:
+        return _report_cache.get(key)
+    entry = _report_cache.get(key)
+    if entry and entry[0] > time.time():
+        return entry[1]
+    return None
+
+
+def _cache_set(key: str, report: dict):
+    if diskcache is not None:
+        _report_cache.set(key, report, expire=CACHE_TTL)
+    else:
+        _report_cache[key] = (time.time() + CACHE_TTL, report)
+
+
+def _analyze_clinic(clinic_name: str, clinic_location: str, force_refresh: bool = False):
+    """Analyse une clinique (ou relit le cache); retourne (payload, status)"""
+    key = _cache_key(clinic_name, clinic_location)
+    _cache_stats['calls'] += 1
+
+    if not force_refresh:
+        cached = _cache_get(key)
+        if cached is not None:
+            _cache_stats['hits'] += 1
+            return {"success": True, "cached": True, "data": cached}, 200
+
+    analyzer = ReputationAnalyzer(clinic_name, clinic_location)
+
+    reviews = analyzer.scrape_google_reviews()
+    if not reviews:
+        return {"error": "Impossible de récupérer les avis", "clinic_name": clinic_name}, 404
+
+    report = analyzer.generate_report_data()
+    if not report:
+        return {"error": "Impossible de générer le rapport", "clinic_name": clinic_name}, 500
+
+    _cache_set(key, report)
+    return {"success": True, "cached": False, "data": report}, 200
+
 @app.route('/')
 def home():
     """Page d'accueil"""
@@ -14,6 +103,7 @@ def home():
     <ul>
         <li><strong>GET /health</strong> - Vérifier le statut</li>
         <li><strong>POST /analyze</strong> - Analyser une clinique</li>
+        <li><strong>POST /batch_analyze</strong> - Analyser plusieurs cliniques</li>
     </ul>
     <h3>Exemple POST /analyze:</h3>
     <pre>
@@ -27,11 +117,17 @@ def home():
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
-    return jsonify({
+    calls = _cache_stats['calls']
+    return ojson({
         "status": "healthy",
         "service": "NuevoSmile Reputation Analyzer",
-        "version": "1.0.0"
-    }), 200
+        "version": "1.0.0",
+        "cache": {
+            "hits": _cache_stats['hits'],
+            "calls": calls,
+            "hit_rate": round(_cache_stats['hits'] / calls, 3) if calls else 0.0
+        }
+    })
 
 @app.route('/analyze', methods=['POST'])
 def analyze():
@@ -49,48 +145,81 @@ def analyze():
         data = request.get_json()
         
         if not data:
-            return jsonify({
+            return ojson({
                 "error": "Pas de données JSON reçues"
-            }), 400
-        
+            }, 400)
+
         clinic_name = data.get('clinic_name')
         clinic_location = data.get('clinic_location')
-        
+
         if not clinic_name or not clinic_location:
-            return jsonify({
+            return ojson({
                 "error": "clinic_name et clinic_location sont requis"
-            }), 400
-        
-        # Créer l'analyseur
-        analyzer = ReputationAnalyzer(clinic_name, clinic_location)
-        
-        # Scraper les avis
-        reviews = analyzer.scrape_google_reviews()
-        
-        if not reviews:
-            return jsonify({
-                "error": "Impossible de récupérer les avis"
-            }), 404
-        
-        # Générer le rapport
-        report = analyzer.generate_report_data()
-        
-        if not report:
-            return jsonify({
-                "error": "Impossible de générer le rapport"
-            }), 500
-        
-        # Retourner le rapport
-        return jsonify({
+            }, 400)
+
+        # Analyse (avec cache, ?force_refresh=1 pour ignorer)
+        payload, status = _analyze_clinic(
+            clinic_name, clinic_location,
+            force_refresh=request.args.get('force_refresh') == '1'
+        )
+        return ojson(payload, status)
+
+    except Exception as e:
+        return ojson({
+            "error": str(e)
+        }, 500)
+
+
+@app.route('/batch_analyze', methods=['POST'])
+def batch_analyze():
+    """
+    Analyser plusieurs cliniques en parallèle
+
+    Body JSON:
+    {
+        "clinics": [
+            {"clinic_name": "Nom", "clinic_location": "Ville"},
+            ...
+        ]
+    }
+    """
+    try:
+        data = request.get_json()
+        clinics = (data or {}).get('clinics')
+
+        if not clinics or not isinstance(clinics, list):
+            return ojson({
+                "error": "Liste 'clinics' requise"
+            }, 400)
+
+        for clinic in clinics:
+            if not clinic.get('clinic_name') or not clinic.get('clinic_location'):
+                return ojson({
+                    "error": "clinic_name et clinic_location sont requis pour chaque clinique"
+                }, 400)
+
+        force_refresh = request.args.get('force_refresh') == '1'
+
+        # Fan-out threadé: chaque analyse attend surtout SerpAPI/OpenAI,
+        # N cliniques prennent ~le temps de la plus lente au lieu de la somme
+        with ThreadPoolExecutor(max_workers=min(len(clinics), BATCH_WORKERS)) as executor:
+            results = list(executor.map(
+                lambda c: _analyze_clinic(c['clinic_name'], c['clinic_location'], force_refresh)[0],
+                clinics
+            ))
+
+        return ojson({
             "success": True,
-            "data": report
-        }), 200
-        
+            "results": results
+        })
+
     except Exception as e:
-        return jsonify({
+        return ojson({
             "error": str(e)
-        }), 500
+        }, 500)
 
 if __name__ == '__main__':
+    # Dev local uniquement — en production le Procfile lance gunicorn
+    # (workers threadés: le chemin chaud est de l'attente réseau SerpAPI/OpenAI)
     port = int(os.environ.get('PORT', 8080))
-    app.run(host='0.0.0.0', port=port, debug=False)
+    app.run(host='0.0.0.0', port=port, debug=os.environ.get('FLASK_ENV') == 'development')
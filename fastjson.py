@@ -0,0 +1,45 @@
+"""
+Shim JSON — orjson > ujson > stdlib
+
+Une seule interface (loads/dumps/dumps_pretty) quel que soit le backend
+installé: orjson (binaire Rust, le plus rapide) quand il est disponible,
+ujson (C, compile partout) sinon, stdlib json en dernier recours — par
+exemple sur les conteneurs ARM/Alpine où la roue orjson ne s'installe pas.
+"""
+
+try:
+    import orjson as _impl
+
+    def dumps(obj) -> str:
+        """Sérialisation compacte (une ligne, accents intacts)"""
+        return _impl.dumps(obj).decode()
+
+    def dumps_pretty(obj) -> str:
+        """Sérialisation indentée (rapports lisibles sur disque)"""
+        return _impl.dumps(obj, option=_impl.OPT_INDENT_2).decode()
+
+    def dumps_bytes(obj) -> bytes:
+        """Bytes UTF-8 natifs, sans décodage Python (corps de réponses HTTP)"""
+        return _impl.dumps(obj)
+
+    loads = _impl.loads
+
+except ImportError:
+    try:
+        import ujson as _impl
+    except ImportError:
+        import json as _impl
+
+    def dumps(obj) -> str:
+        """Sérialisation compacte (une ligne, accents intacts)"""
+        return _impl.dumps(obj, ensure_ascii=False)
+
+    def dumps_pretty(obj) -> str:
+        """Sérialisation indentée (rapports lisibles sur disque)"""
+        return _impl.dumps(obj, ensure_ascii=False, indent=2)
+
+    def dumps_bytes(obj) -> bytes:
+        """Bytes UTF-8 natifs, sans décodage Python (corps de réponses HTTP)"""
+        return _impl.dumps(obj, ensure_ascii=False).encode()
+
+    loads = _impl.loads